@@ -1,33 +1,84 @@
 """PEP-517 compliant buildsystem API"""
+import collections
+import concurrent.futures
 import contextlib
+import copy
+import functools
+import io
+import itertools
 import sysconfig
 import logging
+import mmap
 import sys
 import tempfile
 import tarfile
+import time
 import zipfile
 import os
-import json
 import subprocess
-import toml
 import abc
-import re
 import shlex
+import shutil
+import stat
+import string
 import typing as T
 
+try:
+    import tomllib
+except ImportError:
+    import tomli as tomllib
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 from gzip import GzipFile
 from pathlib import Path
 
 from packaging.specifiers import SpecifierSet
 from packaging.version import Version
-from wheel.wheelfile import WheelFile
+from wheel.wheelfile import WheelFile, get_zipinfo_datetime
 
 from .pep425tags import get_abbr_impl, get_abi_tag, get_impl_ver, get_platform_tag
-from .schema import VALID_OPTIONS
+from .schema import REQUIRED_OPTIONS, VALID_OPTIONS
 
 log = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=None)
+def _parse_jobs(value: str) -> T.Optional[int]:
+    """Parses a MESONPEP517_JOBS value, warning only once about invalid ones"""
+    try:
+        jobs = int(value)
+    except ValueError:
+        log.warning(f"Ignoring MESONPEP517_JOBS={value}, it must be a positive integer")
+        return None
+
+    if jobs < 1:
+        log.warning(f"MESONPEP517_JOBS={value} is not a positive integer, using 1 job")
+        return 1
+
+    return jobs
+
+
+def get_jobs() -> int:
+    """Number of parallel jobs, can be set with the MESONPEP517_JOBS
+    environment variable and defaults to the number of CPUs"""
+    jobs = os.environ.get('MESONPEP517_JOBS')
+    if jobs:
+        jobs = _parse_jobs(jobs)
+        if jobs:
+            return jobs
+
+    return os.cpu_count() or 1
+
+
+def has_jobs_override() -> bool:
+    jobs = os.environ.get('MESONPEP517_JOBS')
+    return bool(jobs) and _parse_jobs(jobs) is not None
+
+
 def setup_logging(config_settings: T.Dict[str, str]):
     config_settings = config_settings or {}
     level = logging.WARNING
@@ -35,11 +86,14 @@ def setup_logging(config_settings: T.Dict[str, str]):
     if log_level:
         level = getattr(logging, log_level.upper(), None)
         if not isinstance(level, int):
-            raise Exception("Invalid value for --log `{log_level}`.")
+            raise Exception(f"Invalid value for --log `{log_level}`.")
     elif '-v' in config_settings or '--verbose' in config_settings:
         level = logging.INFO
 
+    # basicConfig() is a no-op once the root logger has handlers, set the
+    # level on our own logger so it is honoured for every build step.
     logging.basicConfig(level=level)
+    log.setLevel(level)
 
 
 class MesonCommand(abc.ABC):
@@ -49,39 +103,33 @@ class MesonCommand(abc.ABC):
         self.config_settings = config_settings or {}
 
         extra_args = self.config_settings.get(f'--{subcommand}-args')
-        if extra_args:
-            self.args = tuple([subcommand, *args, *shlex.split(extra_args)])
-        else:
-            self.args = tuple([subcommand, *args])
+        self.extra_args = tuple(shlex.split(extra_args)) if extra_args else ()
+        self.args = (subcommand, *args, *self.extra_args)
 
         self.builddir = builddir
 
-    def execute(self) -> bytes:
+    def execute(self) -> None:
+        # Disabling scanner cache to avoid `Invalid cross-device link`
+        # renaming the cache.
+        env = {**os.environ, 'GI_SCANNER_DISABLE_CACHE': '1'}
+        args = (self.__exe, *self.args)
+
+        # meson writes straight to our stdout and stderr
         try:
-            env = os.environ.copy()
-            # Disabling scanner cache to avoid `Invalid cross-device link`
-            # renaming the cache.
-            env['GI_SCANNER_DISABLE_CACHE'] = '1'
-            kwargs = {
-                'env': env
-            }
-            args = [self.__exe, *self.args]
-            if logging.root.level <= logging.INFO:
-                subprocess.check_call(args, **kwargs)
-                return b''
-            else:
-                return subprocess.check_output(args, **kwargs)
-        except subprocess.CalledProcessError as e:
-            log.error("Could not run meson")
-            if logging.root.level <= logging.DEBUG:
-                fulllog = os.path.join(self.builddir, 'meson-logs', 'meson-log.txt')
-                try:
-                    with open(fulllog) as f:
-                        print(f"Full log:\n{f.read()}")
-                except:
-                    log.error(f"Could not open {fulllog}")
-                    pass
-            raise e
+            subprocess.check_call(args, env=env)
+        except subprocess.CalledProcessError:
+            self.__report_failure()
+            raise
+
+    def __report_failure(self):
+        log.error("Could not run meson")
+        if log.isEnabledFor(logging.DEBUG):
+            fulllog = os.path.join(self.builddir, 'meson-logs', 'meson-log.txt')
+            try:
+                with open(fulllog, 'rb') as f:
+                    print(f"Full log:\n{f.read().decode(errors='replace')}", file=sys.stderr)
+            except OSError:
+                log.error(f"Could not open {fulllog}")
 
 
 class MesonSetupCommand(MesonCommand):
@@ -89,14 +137,13 @@ class MesonSetupCommand(MesonCommand):
     def __init__(self, config: "Config",
                  installdir: str=None, builddir: str=None,
                  config_settings: T.Dict[str, str]=None) -> None:
-        self.config_settings = config_settings or {}
-
         args = self.__get_args(config, installdir, builddir)
         log.debug(f"Setup args: {args[1:]}")
 
+        MesonCommand.__init__(self, 'setup', *args, builddir=builddir, config_settings=config_settings)
+
         # Protect against user overriding prefix/libdir
-        extra_args = self.config_settings.get("--setup-args", "")
-        for arg in shlex.split(extra_args):
+        for arg in self.extra_args:
             if arg.startswith(("-Dprefix=", "--prefix")):
                 log.error("mesonpep517 does not support overriding the prefix")
                 sys.exit(1)
@@ -104,8 +151,6 @@ class MesonSetupCommand(MesonCommand):
                 log.error("mesonpep517 does not support overriding the libdir")
                 sys.exit(1)
 
-        MesonCommand.__init__(self, 'setup', *args, builddir=builddir, config_settings=config_settings)
-
     @staticmethod
     def __get_args(config, installdir, builddir=None):
         if config is None:
@@ -120,29 +165,32 @@ class MesonSetupCommand(MesonCommand):
 class MesonDistCommand(MesonCommand):
     """First two args must be '-C' and the builddir"""
 
-    __formats_regex = re.compile(r'[\'"]?([a-z,]+)[\'"]?')
+    __formats_chars = frozenset(string.ascii_lowercase + ',')
 
     def __init__(self, *args: str, config_settings: T.Dict[str, str]={}) -> None:
         MesonCommand.__init__(self, 'dist', *args, '--include-subprojects',
             builddir=args[1], config_settings=config_settings)
+        # Parsed upfront so invalid values are reported before running meson
+        self.__formats = self.__parse_formats()
 
     def formats(self) -> T.Optional[T.Tuple[str]]:
         """If formats is not passed in config_settings, defaults to ('xztar',)"""
+        return self.__formats
+
+    def __parse_formats(self) -> T.Optional[T.Tuple[str]]:
         for i, a in enumerate(self.args):
             if a == '--formats':
-                match = self.__formats_regex.match(self.args[i+1])
+                value = self.args[i+1]
             elif a.startswith('--formats='):
-                match = self.__formats_regex.match(a.split('=')[1])
+                value = a.partition('=')[2]
             else:
                 continue
-            if not match:
+            # Strip the quotes that may be around the value
+            value = value.strip().strip('\'"')
+            if not value or not self.__formats_chars.issuperset(value):
                 log.warning('Invalid "--formats" option. Please read Meson documentation for help.')
                 return None
-            group = match.groups()[0]
-            if not group:
-                log.warning('Invalid "--formats" option. Please read Meson documentation for help.')
-                return None
-            return T.cast(T.Tuple[str], group.split(','))
+            return tuple(value.split(','))
 
         return ('xztar',)
 
@@ -158,17 +206,33 @@ class MesonDistCommand(MesonCommand):
             assert False
 
 
+class MesonCompileCommand(MesonCommand):
+    """First two args must be '-C' and the builddir"""
+    def __init__(self, *args: str, config_settings: T.Dict[str, str]={}) -> None:
+        MesonCommand.__init__(self, 'compile', *args, builddir=args[1], config_settings=config_settings)
+
+
 class MesonInstallCommand(MesonCommand):
     """First two args must be '-C' and the builddir"""
     def __init__(self, *args: str, config_settings: T.Dict[str, str]={}) -> None:
         MesonCommand.__init__(self, 'install', *args, builddir=args[1], config_settings=config_settings)
 
 
-PKG_INFO = """\
-Metadata-Version: 2.1
-Name: {name}
-Version: {version}
-"""
+def _get_pkg_info_header(name, version):
+    return f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n"
+
+
+# Single value fields and their core metadata header
+METADATA_HEADERS = {
+    'summary': 'Summary',
+    'home-page': 'Home-page',
+    'homepage': 'Homepage',
+    'author': 'Author',
+    'author-email': 'Author-email',
+    'maintainer': 'Maintainer',
+    'maintainer-email': 'Maintainer-email',
+    'requires-python': 'Requires-Python',
+}
 
 
 readme_ext_to_content_type = {
@@ -179,6 +243,20 @@ readme_ext_to_content_type = {
 }
 
 
+def _get_platlib_suffix():
+    variables = sysconfig.get_config_vars()
+    platlib_suffix = variables.get('EXT_SUFFIX') or variables.get(
+        'SO') or variables.get('.so')
+    # msys2's python3 has "-cpython-36m.dll", we have to be clever
+    split = platlib_suffix.rsplit('.', 1)
+
+    return f".{split.pop(-1)}"
+
+
+# The extension suffix can't change while we are running
+_PLATLIB_SUFFIX = _get_platlib_suffix()
+
+
 class InstallPlan:
     def __init__(self, config: "Config", config_settings: T.Dict[str, str]):
         self.config_settings = config_settings or {}
@@ -186,9 +264,18 @@ class InstallPlan:
         self.__config = config
         self.__targets = {} # List of installed files for a local target
         self.__install_plan = None
+        self.__installed = config.introspect('installed')
+
+        self.is_pure = True
+
+        # Sets as get_wheel_path() checks membership for every installed file
+        self.platlibs = set()
+        self.distribution_files = []
+        self.typelibs = set()
+        self.__wheel_paths = {} # Archive name of distribution files inside the wheel
+
         try:
             self.__install_plan = config.introspect('install_plan')
-            self.__installed = config.introspect('installed')
 
             for target in config.introspect('targets'):
                 install_filenames = target.get('install_filename')
@@ -196,15 +283,19 @@ class InstallPlan:
                     for filename in target['filename']:
                         self.__targets[filename] = install_filenames
         except FileNotFoundError:
-            self.__installed = config.introspect('installed')
+            pass
 
-        self.is_pure = True
+        self.__inspect()
 
-        self.platlibs = []
-        self.distribution_files = []
-        self.typelibs = []
+    def __add_distribution_file(self, installpath: str, wheel_path: str = None):
+        if wheel_path is None:
+            # Relative to the last `site-packages` component
+            _, sep, wheel_path = installpath.replace('\\', '/').rpartition('/site-packages/')
+            if not sep:
+                raise ValueError(f"{installpath} is not in a site-packages directory")
 
-        self.__inspect()
+        self.distribution_files.append(installpath)
+        self.__wheel_paths[installpath] = wheel_path
 
     def __inspect(self):
         if self.__install_plan is None:
@@ -216,23 +307,24 @@ class InstallPlan:
             # module yet to generate the typelibs.
             ".typelib": self.typelibs,
         }
-        for section_data in self.__install_plan.items():
-            section = section_data[0]
-            data = section_data[1]
+        for section, data in self.__install_plan.items():
             for build_filepath, info in data.items():
-                installpath = Path(self.__installed[build_filepath])
-                destination = Path(info['destination'])
-                if section == "python":
-                    if destination.parts[0] == '{py_platlib}':
+                installpath = self.__installed[build_filepath]
+                # Destinations look like `{placeholder}/relative/path`
+                root, _, relpath = info['destination'].replace('\\', '/').partition('/')
+                if section == "python" or root in ('{py_purelib}', '{py_platlib}'):
+                    if root == '{py_platlib}':
                         self.is_pure = False
-                    self.distribution_files.append(str(installpath))
-                elif destination.parts[0] == '{libdir_shared}':
-                    self.platlibs += self.__targets[build_filepath]
-                elif destination.parts[0] == '{module_shared}':
+                    self.__add_distribution_file(installpath, relpath)
+                elif root == '{libdir_shared}':
+                    self.platlibs.update(self.__targets[build_filepath])
+                elif root == '{module_shared}':
                     self.is_pure = False
-                    self.distribution_files.append(str(installpath))
-                elif installpath.suffix in data_infos:
-                    data_infos[installpath.suffix].append(str(installpath))
+                    self.__add_distribution_file(installpath)
+                else:
+                    suffix = os.path.splitext(installpath)[1]
+                    if suffix in data_infos:
+                        data_infos[suffix].add(installpath)
 
     def __iter__(self):
         for p in self.__installed.values():
@@ -241,59 +333,73 @@ class InstallPlan:
     def __legacy_inspect(self):
         log.warning('Old meson version detected. Using fragile heuristics to'
                     ' determine how to build the wheel.')
-        variables = sysconfig.get_config_vars()
-        platlib_suffix = variables.get('EXT_SUFFIX') or variables.get(
-            'SO') or variables.get('.so')
-        # msys2's python3 has "-cpython-36m.dll", we have to be clever
-        split = platlib_suffix.rsplit('.', 1)
-
-        platlib_suffix = f".{split.pop(-1)}"
+        platlib_suffix = _PLATLIB_SUFFIX
         data_infos = {
             ".typelib": self.typelibs,
         }
 
-        install_paths = self.__installed.values()
-        for installpath in install_paths:
-            installpath = Path(installpath)
-            if installpath.suffix == platlib_suffix:
+        platlib_ext = platlib_suffix[1:]
+        for installpath in self.__installed.values():
+            suffix = os.path.splitext(installpath)[1]
+            # A single extension module is enough to make the wheel non-pure
+            if self.is_pure and suffix == platlib_suffix:
                 self.is_pure = False
 
-            if 'site-packages' in str(installpath):
-                self.distribution_files.append(str(installpath))
-            elif platlib_suffix in installpath.suffixes:
-                self.platlibs.append(str(installpath))
-            elif installpath.suffix in data_infos:
-                data_infos[installpath.suffix].append(str(installpath))
-
+            if 'site-packages' in installpath:
+                self.__add_distribution_file(installpath)
+            elif platlib_ext in os.path.basename(installpath).split('.')[1:]:
+                self.platlibs.add(installpath)
+            elif suffix in data_infos:
+                data_infos[suffix].add(installpath)
 
     def get_wheel_path(self, file):
-        installpath = Path(file)
-        if str(installpath) in self.distribution_files:
-            installpath = Path(file)
-            path = Path()
-            while installpath.name != 'site-packages':
-                path = installpath.name / path
-                installpath = installpath.parent
-
-            return path
-
+        if file in self.__wheel_paths:
+            return self.__wheel_paths[file]
         elif file in self.platlibs:
-            return f"{self.__config['module']}.libs" / Path(installpath.name)
+            return f"{self.__config['module']}.libs/{os.path.basename(file)}"
         elif file in self.typelibs:
-            return Path(f"{self.__config['module']}.data") / 'platlib' / 'girepository-1.0' / Path(installpath.name)
+            return f"{self.__config['module']}.data/platlib/girepository-1.0/{os.path.basename(file)}"
 
         log.debug(f"{file} won't be packed")
         return None
 
 
+@functools.lru_cache(maxsize=4)
+def _load_pyproject(path: str, mtime_ns: int) -> T.Dict[str, T.Any]:
+    """Parses `path`, the modification time is only used as cache key"""
+    with open(path, 'rb') as f:
+        return tomllib.load(f)
+
+
+@functools.lru_cache(maxsize=16)
+def _load_introspection(path: str, mtime_ns: int) -> T.Any:
+    """Parses the meson introspection file at `path`, shared between the
+    Config instances of the different hooks so callers must not modify it"""
+    with open(path, 'rb') as f:
+        return json_loads(f.read())
+
+
+@functools.lru_cache(maxsize=8)
+def _read_text_cached(path: str, mtime_ns: int) -> str:
+    """Reads `path`, the modification time is only used as cache key"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _read_text(path) -> str:
+    path = os.path.abspath(path)
+    return _read_text_cached(path, os.stat(path).st_mtime_ns)
+
+
 class Config:
     def __init__(self, config_settings: T.Dict[str, str], builddir=None):
         self.config_settings = config_settings or {}
 
         config = self.__get_config()
         self.__set_metadata_backward_compat(config)
-        self.__entry_points = config.get('tool', {}).get('mesonpep517', {}).get('entry-points', [])
         self.__install_plan = None
+        self.__wheel_tag = None
+        self.__introspection = {}
         self.options = []
         self.builddir = None
         if builddir:
@@ -308,6 +414,13 @@ class Config:
 
         return self.__install_plan
 
+    @property
+    def wheel_tag(self):
+        if self.__wheel_tag is None:
+            self.__wheel_tag = get_wheel_tag(self, self.install_plan.is_pure)
+
+        return self.__wheel_tag
+
     def _warn_deprecated_field(self, field, replacement):
         log.warning(
             f"Field `tool.mesonpep517.metadata.{field}` is deprecated since version 0.3."
@@ -322,27 +435,31 @@ class Config:
 
         projects_urls = config.get('project', {}).get('urls')
         if projects_urls:
-            urls = []
-            for label, url in projects_urls.items():
-                urls.append(f'{label.capitalize()}, {url}')
-            self.__config['project-urls'] = urls
+            self.__config['project-urls'] = [
+                f'{label.capitalize()}, {url}' for label, url in projects_urls.items()]
 
+        project = config.get('project', {})
         entry_points = {}
-        entry_point_types = ['scripts', 'gui-scripts'] + list(config.get('project', {}).get('entry-points', {}).keys())
-        for entry_point_type in entry_point_types:
-            entry_point = config.get('project', {}).get(entry_point_type)
+        entry_point_types = itertools.chain(
+            (('scripts', 'console_scripts', project.get('scripts')),
+             ('gui-scripts', 'gui_scripts', project.get('gui-scripts'))),
+            ((f'entry-points.{group}', group, entry_point)
+             for group, entry_point in project.get('entry-points', {}).items()))
+        for entry_point_type, group_name, entry_point in entry_point_types:
             if not entry_point:
                 continue
             if not isinstance(entry_point, dict):
                 raise RuntimeError(f"`project.{entry_point_type}` should be a dictionary")
 
-            epoints = []
-            for k, v in entry_point:
-                epoints = f'{k} = {v}'
-            entry_points[entry_point_type] = epoints
+            epoints = [f'{k} = {v}' for k, v in entry_point.items()]
+            if epoints:
+                entry_points[group_name] = epoints
 
-        if entry_points:
-            self.__entry_points = entry_points
+        if not entry_points:
+            entry_points = config.get('tool', {}).get('mesonpep517', {}).get('entry-points', {})
+        # Sorted once here so that entry_points.txt is reproducible
+        self.__entry_points = {group_name: tuple(sorted(group))
+                               for group_name, group in sorted(entry_points.items())}
 
         for old_name, new_name in {
                 'description-file': 'readme',
@@ -361,29 +478,41 @@ class Config:
             self['license'] = {'text': self['license']}
 
     def validate_options(self):
-        options = VALID_OPTIONS.copy()
-        options['version'] = {}
-        options['module'] = {}
         for field, value in self.__config.items():
-            if field not in options:
+            if field in ('version', 'module'):
+                continue
+
+            desc = VALID_OPTIONS.get(field)
+            if desc is None:
                 raise RuntimeError("%s is not a valid option in the `[project]` section, "
                     "got value: %s" % (field, value))
 
-            replacement = options[field].get('deprecated-by')
+            replacement = desc.get('deprecated-by')
             if field in self.__metadata and replacement:
                 self._warn_deprecated_field(field, replacement)
-            del options[field]
 
-        for field, desc in options.items():
-            if desc.get('required'):
+        for field in REQUIRED_OPTIONS:
+            if field not in self.__config:
                 raise RuntimeError("%s is mandatory in the `[tool.mesonpep517.metadata] section but was not found" % field)
 
+    def introspection_file(self, introspect_type):
+        return os.path.join(self.builddir, 'meson-info', 'intro-' + introspect_type + '.json')
+
     def introspect(self, introspect_type):
-        with open(os.path.join(self.builddir, 'meson-info', 'intro-' + introspect_type + '.json')) as f:
-            return json.load(f)
+        try:
+            return self.__introspection[introspect_type]
+        except KeyError:
+            pass
+
+        path = self.introspection_file(introspect_type)
+        res = self.__introspection[introspect_type] = _load_introspection(
+            path, os.stat(path).st_mtime_ns)
+
+        return res
 
     def set_builddir(self, builddir: os.PathLike):
         self.builddir = builddir
+        self.__introspection = {}
         project = self.introspect('projectinfo')
 
         self['version'] = project['version']
@@ -407,65 +536,47 @@ class Config:
 
     @staticmethod
     def __get_config():
-        with open('pyproject.toml') as f:
-            config = toml.load(f)
+        path = os.path.abspath('pyproject.toml')
+        # Callers are free to modify the returned configuration
+        config = copy.deepcopy(_load_pyproject(path, os.stat(path).st_mtime_ns))
+        try:
+            config['tool']['mesonpep517']['metadata']
             try:
-                config['tool']['mesonpep517']['metadata']
-                try:
-                    config['project']
-                except KeyError:
-                    raise RuntimeError("`[project]` section is mandatory "
-                        "for the meson backend")
-            except:
-                pass
+                config['project']
+            except KeyError:
+                raise RuntimeError("`[project]` section is mandatory "
+                    "for the meson backend")
+        except:
+            pass
 
-            return config
+        return config
 
     def get(self, key, default=None):
         return self.__config.get(key, default)
 
     def get_metadata(self):
-        meta = {
-            'name': self['module'],
-            'version': self['version'],
-        }
+        return _get_pkg_info_header(self['module'], self['version']) + \
+            self.get_metadata_fields()
 
+    def get_metadata_fields(self):
+        """METADATA without the name and version, doesn't need the builddir"""
         if 'pkg-info-file' in self:
-            res = '\n'.join(PKG_INFO.split('\n')[:3]).format(**meta) + '\n'
-            with open(self['pkg-info-file'], 'r') as f:
-                orig_lines = f.readlines()
-                for l in orig_lines:
-                    if l.startswith('Metadata-Version:') or \
-                            l.startswith('Version:'):
-                        continue
-                    res += l
+            return ''.join(l for l in _read_text(self['pkg-info-file']).splitlines(keepends=True)
+                           if not l.startswith(('Metadata-Version:', 'Version:')))
 
-            return  res
+        res = []
 
-        res = PKG_INFO.format(**meta)
-
-        for key, metadata in [
-                ('description', 'Summary'),
-                ('home-page', None),
-                ('homepage', None),
-                ('author', None),
-                ('author-email', None),
-                ('maintainer', None),
-                ('maintainer-email', None)]:
-            if key in self:
-                metadata = metadata or key.capitalize()
-                res += '{}: {}\n'.format(metadata, self[key])
+        res.extend(f'{metadata}: {self[key]}\n'
+                   for key, metadata in METADATA_HEADERS.items() if key in self)
 
         for key in ['authors', 'maintainers']:
-            authors = self.get(key, [])
-            for author in authors:
+            field = key[:-1].capitalize()
+            # Not comprehensions, the name and email of a person stay together
+            for author in self.get(key, []):
                 if 'name' in author:
-                    res += f"{key[:-1].capitalize()}: {author['name']}\n"
+                    res.append(f"{field}: {author['name']}\n")
                 if 'email' in author:
-                    res += f"{key[:-1].capitalize()}-email: {author['email']}\n"
-
-        if key == 'requires-python' and key in self:
-            res += '{}: {}\n'.format(key.title(), self[key])
+                    res.append(f"{field}-email: {author['email']}\n")
 
         for key, mdata_key in [
                 ('dependencies', 'Requires-Dist'),
@@ -473,8 +584,7 @@ class Config:
                 ('project-urls', 'Project-URL')]:
 
             vals = self.get(key, [])
-            for val in vals:
-                res += '{}: {}\n'.format(mdata_key, val)
+            res.extend(f'{mdata_key}: {val}\n' for val in vals)
 
         license = None
         if 'license' in self:
@@ -482,55 +592,41 @@ class Config:
             if not license:
                 license_file = self['license'].get('file')
                 if license_file:
-                    with open(license_file, 'r') as f:
-                        license = f.read()
+                    license = _read_text(license_file)
             elif self['license'].get('file'):
                 raise RuntimeError('license field can only have one of text or file.')
 
         if license:
-            res += 'License:\n'
-            for line in license.split('\n'):
-                res += ' ' * 7 + '|{}\n'.format(line)
+            res.append('License:\n')
+            # Every line, including empty ones, is prefixed
+            res.append('       |' + license.replace('\n', '\n       |') + '\n')
 
         readme = ''
         description_content_type = 'text/plain'
         if 'readme' in self:
-            description_file = Path(self['readme'])
-            with open(description_file, 'r') as f:
-                readme = f.read()
+            description_file = self['readme']
+            readme = _read_text(description_file)
 
             description_content_type = readme_ext_to_content_type.get(
-                description_file.suffix.lower(), description_content_type)
+                os.path.splitext(description_file)[1].lower(), description_content_type)
         elif 'description' in self:
             readme = self['description']
 
         if readme:
-            res += 'Description-Content-Type: {}\n'.format(description_content_type)
-            res += 'Description:\n\n' + readme
+            res.append(f'Description-Content-Type: {description_content_type}\n')
+            res.append('Description:\n\n')
+            res.append(readme)
 
-        return res
+        return ''.join(res)
 
     def get_entry_points(self):
-        res = ''
-        for group_name in sorted(self.__entry_points):
-            res += '[{}]\n'.format(group_name)
-            group = self.__entry_points[group_name]
-            for entrypoint in sorted(group):
-                res += '{}\n'.format(entrypoint)
-            res += '\n'
-
-        return res
+        res = []
+        for group_name, group in self.__entry_points.items():
+            res.append(f'[{group_name}]\n')
+            res.extend(f'{entrypoint}\n' for entrypoint in group)
+            res.append('\n')
 
-
-@contextlib.contextmanager
-def cd(path):
-    CWD = os.getcwd()
-
-    os.chdir(path)
-    try:
-        yield
-    finally:
-        os.chdir(CWD)
+        return ''.join(res)
 
 
 def get_requires_for_build_wheel(config_settings: T.Dict[str, str]):
@@ -550,9 +646,18 @@ Tag: {tag}
 """
 
 
-def _write_wheel_file(f, is_pure, wheel_tag):
-    f.write(wheel_file_template.format(is_pure=str(is_pure).lower(),
-                                       tag=wheel_tag))
+def _get_dist_info(config, metadata_fields: str, entrypoints: str) -> T.Tuple[str, T.Dict[str, str]]:
+    """Returns the name of the .dist-info directory and the content of its files"""
+    files = {
+        'WHEEL': wheel_file_template.format(
+            is_pure=str(config.install_plan.is_pure).lower(), tag=config.wheel_tag),
+        'METADATA': _get_pkg_info_header(config['module'], config['version']) + metadata_fields,
+    }
+    if entrypoints:
+        files['entry_points.txt'] = entrypoints
+
+    return '{}-{}.dist-info'.format(config['module'], config['version']), files
+
 
 class NoPythonVersion(Exception):
     """
@@ -591,6 +696,11 @@ def _py2_or_py3(supports_py2, supports_py3):
     return (supports_py2, supports_py3)
 
 
+_PY2_0 = Version('2.0')
+_PY3_0 = Version('3.0')
+
+
+@functools.lru_cache(maxsize=64)
 def python_major_support(python_requirements):
     """
     Process version specifiers tell whether python2 or python3 are supported.
@@ -610,10 +720,8 @@ def python_major_support(python_requirements):
     compat_from_old_format = None
     old_format_python_versions = python_requirements.split('.')
     if 'py2' in old_format_python_versions:
-        if 'py3' in old_format_python_versions:
-            compat_from_old_format = (True, True)
-        compat_from_old_format = (True, False)
-    if 'py3' in old_format_python_versions:
+        compat_from_old_format = (True, 'py3' in old_format_python_versions)
+    elif 'py3' in old_format_python_versions:
         compat_from_old_format = (False, True)
 
     if compat_from_old_format:
@@ -623,7 +731,10 @@ def python_major_support(python_requirements):
                     ' `py2` and `py3` will be removed in a future version')
         return compat_from_old_format
 
-    python_specifiers = SpecifierSet(python_requirements)
+    # Don't bother parsing the common empty case
+    python_specifiers = None
+    if python_requirements.strip():
+        python_specifiers = SpecifierSet(python_requirements)
 
     # The user has not specified what versions of python we run on
     if not python_specifiers:
@@ -638,56 +749,48 @@ def python_major_support(python_requirements):
 
     supports_py2 = supports_py3 = None
     for spec in python_specifiers:
-        version = Version(spec.version)
+        # Wildcards are only valid with == and !=, like `==3.*`
+        version = spec.version
+        if version.endswith('.*'):
+            version = version[:-2]
+        version = Version(version)
+        major = version.major
 
         if spec.operator in ('==', '~='):
-            if version.major == 3:
+            if major == 3:
                 supports_py2, supports_py3 = _py3_only(supports_py2, supports_py3)
-            elif version.major == 2:
+            elif major == 2:
                 supports_py2, supports_py3 = _py2_only(supports_py2, supports_py3)
             else:  # version.major is neither 2 nor 3
                 raise NoPythonVersion('Packages must support either Python2 or'
                                       f' Python3 but `{spec}` precludes that.')
 
-        if spec.operator == '>=':
-            if version.major == '3':
+        elif spec.operator in ('>=', '>'):
+            if major == 3:
                 supports_py2, supports_py3 = _py3_only(supports_py2, supports_py3)
-            elif version.major <= '2':
+            elif major <= 2:
                 supports_py2, supports_py3 = _py2_or_py3(supports_py2, supports_py3)
             else:  # version.major is greater than 3
                 raise NoPythonVersion('Packages must support either Python2 or'
                                       f' Python3 but `{spec}` precludes that.')
 
-        if spec.operator in ('<='):
-            if version.major >= 3:
+        elif spec.operator == '<=':
+            if major >= 3:
                 supports_py2, supports_py3 = _py2_or_py3(supports_py2, supports_py3)
-            if version.major == 2:
+            elif major == 2:
                 supports_py2, supports_py3 = _py2_only(supports_py2, supports_py3)
             else:  # version.major is less than 2
                 raise NoPythonVersion('Packages must support either Python2 or'
                                       f' Python3 but `{spec}` precludes that.')
 
-        if spec.operator == '>':
-            if version.major == 3:
-                supports_py2, supports_py3 = _py3_only(supports_py2, supports_py3)
-            if version.major <= 2:
+        elif spec.operator == '<':
+            if version > _PY3_0:
+                # Something like "<3.8" still allows some python3 versions
                 supports_py2, supports_py3 = _py2_or_py3(supports_py2, supports_py3)
-            else:  # version.major is greater than 3
-                raise NoPythonVersion('Packages must support either Python2 or'
-                                      f' Python3 but `{spec}` precludes that.')
-
-        if spec.operator == '<':
-            if version.major >= 3:
-                supports_py2, supports_py3 = _py2_only(supports_py2, supports_py3)
-            if version.major == 2:
-                if version == Version('2.0.0'):
-                    # version.major is less than 2.0
-                    raise NoPythonVersion('Packages must support either'
-                                          f' Python2 or Python3 but `{spec}`'
-                                          ' precludes that.')
-                # Specifier is something like "<2.3" so python2 is supported
+            elif version > _PY2_0:
+                # Something like "<3" or "<2.3" so only python2 is supported
                 supports_py2, supports_py3 = _py2_only(supports_py2, supports_py3)
-            else:  # version.major is less than 2
+            else:  # version is 2.0 or less
                 raise NoPythonVersion('Packages must support either Python2 or'
                                       f' Python3 but `{spec}` precludes that.')
 
@@ -716,7 +819,16 @@ print("%s%s-%s" % (pep425tags.get_abbr_impl(), pep425tags.get_impl_ver(), pep425
 """
 
 
+def _is_current_python(python):
+    path = shutil.which(python)
+    return path is not None and os.path.realpath(path) == os.path.realpath(sys.executable)
+
+
+@functools.lru_cache(maxsize=None)
 def get_impl_abi(python):
+    if _is_current_python(python):
+        return "%s%s-%s" % (get_abbr_impl(), get_impl_ver(), get_abi_tag())
+
     return subprocess.check_output([python, '-c', GET_CHECK]).decode('utf-8').strip()
 
 
@@ -765,6 +877,56 @@ def get_wheel_tag(config, is_pure):
     )
 
 
+def _get_reusable_dirs(config_settings: T.Dict[str, str]) -> T.Tuple[Path, Path]:
+    """Returns the build and install directories set with --builddir, shared
+    by `prepare_metadata_for_build_wheel` and `build_wheel`"""
+    builddir = Path(config_settings['--builddir']).absolute()
+    return builddir, builddir / 'mesonpep517-install'
+
+
+def _is_configured(builddir: Path) -> bool:
+    return (builddir / 'meson-info' / 'intro-projectinfo.json').exists()
+
+
+def _check_prefix(builddir: Path, installdir: Path):
+    """Refuses to reuse a build directory which would install elsewhere than
+    in `installdir`, such as one configured for the system or a virtualenv"""
+    path = builddir / 'meson-info' / 'intro-buildoptions.json'
+    options = _load_introspection(str(path), os.stat(path).st_mtime_ns)
+    prefix = next((opt['value'] for opt in options if opt['name'] == 'prefix'), None)
+    if prefix is None or Path(prefix) != installdir:
+        raise RuntimeError(f"{builddir} was not configured by mesonpep517, its prefix"
+                           f" is {prefix}: building the wheel would install files there."
+                           " Use a dedicated --builddir.")
+
+
+def _regenerate(builddir: Path):
+    """Lets meson reconfigure a reused build directory if the build
+    definition changed, so that its introspection files are up to date"""
+    MesonCompileCommand('-C', str(builddir), '--ninja-args=build.ninja').execute()
+
+
+@contextlib.contextmanager
+def _metadata_builddir(config: "Config", config_settings: T.Dict[str, str]):
+    """Configures a build directory to read the wheel metadata from"""
+    if '--builddir' in config_settings:
+        builddir, installdir = _get_reusable_dirs(config_settings)
+        if _is_configured(builddir):
+            _check_prefix(builddir, installdir)
+            _regenerate(builddir)
+        else:
+            MesonSetupCommand(config, str(installdir), str(builddir),
+                              config_settings=config_settings).execute()
+        yield str(builddir)
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        builddir = os.path.join(workdir, 'build')
+        MesonSetupCommand(config, os.path.join(workdir, 'install'), builddir,
+                          config_settings=config_settings).execute()
+        yield builddir
+
+
 def prepare_metadata_for_build_wheel(metadata_directory,
                                      config_settings: T.Dict[str, str],
                                      builddir=None,
@@ -774,75 +936,145 @@ def prepare_metadata_for_build_wheel(metadata_directory,
     if not config:
         config = Config(config_settings)
 
-    if not builddir:
-        builddir = tempfile.TemporaryDirectory().name
+    with contextlib.ExitStack() as stack:
+        if not builddir:
+            builddir = stack.enter_context(
+                _metadata_builddir(config, config_settings or {}))
 
-        MesonSetupCommand(config, builddir=builddir, config_settings=config_settings).execute()
+        if not had_config:
+            config.set_builddir(builddir)
 
-    if not had_config:
-        config.set_builddir(builddir)
+        dist_info_name, files = _get_dist_info(config, config.get_metadata_fields(),
+                                               config.get_entry_points())
 
-    dist_info = Path(metadata_directory, '{}-{}.dist-info'.format(
-                     config['module'], config['version']))
+    dist_info = Path(metadata_directory, dist_info_name)
     dist_info.mkdir(exist_ok=True)
+    for name, content in files.items():
+        with (dist_info / name).open('w') as f:
+            f.write(content)
 
-    is_pure = config.install_plan.is_pure
-    wheel_tag = get_wheel_tag(config, is_pure)
-    with (dist_info / 'WHEEL').open('w') as f:
-        _write_wheel_file(f, is_pure, wheel_tag)
-
-    with (dist_info / 'METADATA').open('w') as f:
-        f.write(config.get_metadata())
-
-    entrypoints = config.get_entry_points()
-    if entrypoints:
-        with (dist_info / 'entry_points.txt').open('w') as f:
-            f.write(entrypoints)
-
-    return dist_info.name
+    return dist_info_name
 
 
 class WheelBuilder:
     def __init__(self, config_settings: T.Dict[str, str]):
         self.config_settings = config_settings or {}
         self.wheel_zip = None
-        self.builddir = tempfile.TemporaryDirectory()
-        self.installdir = tempfile.TemporaryDirectory()
+        self.builddir = None
+        self.installdir = None
 
     def build(self, wheel_directory: str, metadata_dir: str):
         config = Config(self.config_settings)
 
-        MesonSetupCommand(config, self.installdir.name, self.builddir.name, config_settings=self.config_settings).execute()
-        config.set_builddir(self.builddir.name)
-
-        metadata_dir = prepare_metadata_for_build_wheel(
-            wheel_directory, builddir=self.builddir.name,
-            config_settings=self.config_settings, config=config)
-
-        wheel_tag = get_wheel_tag(config, config.install_plan.is_pure)
+        if '--builddir' in self.config_settings:
+            # Kept around so that meson only rebuilds what changed next time
+            builddir, installdir = _get_reusable_dirs(self.config_settings)
+            self.builddir = str(builddir)
+            self.installdir = str(installdir)
+            if _is_configured(builddir):
+                _check_prefix(builddir, installdir)
+                log.info(f"Reusing build directory {self.builddir}")
+            else:
+                MesonSetupCommand(config, self.installdir, self.builddir, config_settings=self.config_settings).execute()
+            return self.__build(wheel_directory, metadata_dir, config)
+
+        # Only created once the configuration has been loaded successfully
+        with tempfile.TemporaryDirectory() as workdir:
+            self.builddir = os.path.join(workdir, 'build')
+            self.installdir = os.path.join(workdir, 'install')
+            MesonSetupCommand(config, self.installdir, self.builddir, config_settings=self.config_settings).execute()
+            return self.__build(wheel_directory, metadata_dir, config)
+
+    def __build(self, wheel_directory: str, metadata_dir: str, config: "Config"):
+        self.__install()
+        # Name, version and wheel tag come from the introspection files
+        # which `meson install` regenerates when meson.build changed in a
+        # reused build directory.
+        config.set_builddir(self.builddir)
+        dist_info, files = _get_dist_info(config, config.get_metadata_fields(),
+                                          config.get_entry_points())
 
         target_fp = wheel_directory / '{}-{}-{}.whl'.format(
-            config['module'], config['version'], wheel_tag)
+            config['module'], config['version'], config.wheel_tag)
 
+        # The .dist-info files are written straight from memory
         self.wheel_zip = WheelFile(str(target_fp), 'w')
-        for f in os.listdir(str(wheel_directory / metadata_dir)):
-            self.wheel_zip.write(str(wheel_directory / metadata_dir / f),
-                arcname=str(Path(metadata_dir) / f))
+        for name, content in files.items():
+            self.wheel_zip.writestr(f'{dist_info}/{name}', content.encode('utf-8'))
 
-        # Make sure everything is built
-        MesonInstallCommand('-C', self.builddir.name, config_settings=self.config_settings).execute()
         self.pack_files(config)
         self.wheel_zip.close()
         return str(target_fp)
 
+    def __install(self):
+        if has_jobs_override():
+            # `meson install` has no option to set the number of jobs,
+            # compile first with the requested parallelism.
+            MesonCompileCommand('-C', self.builddir, '-j', str(get_jobs()),
+                config_settings=self.config_settings).execute()
+
+        args = ['-C', self.builddir]
+        if '--builddir' in self.config_settings:
+            # Files installed by a previous build are still there, only copy
+            # what was rebuilt since.
+            args.append('--only-changed')
+        MesonInstallCommand(*args,
+            config_settings=self.config_settings).execute()
 
     def pack_files(self, config):
         install_plan = config.install_plan
-        for installpath in install_plan:
-            wheel_path = install_plan.get_wheel_path(installpath)
-            if wheel_path:
-                log.debug(f"{installpath}-----> {wheel_path}")
-                self.wheel_zip.write(installpath, arcname=str(wheel_path))
+        jobs = get_jobs()
+        # Files are read ahead in worker threads so that disk I/O overlaps
+        # with the compression happening in the wheel zip file.
+        pending = collections.deque()
+        with concurrent.futures.ThreadPoolExecutor(jobs) as executor:
+            for installpath in install_plan:
+                wheel_path = install_plan.get_wheel_path(installpath)
+                if wheel_path:
+                    log.debug(f"{installpath}-----> {wheel_path}")
+                    pending.append((wheel_path, executor.submit(_read_file, installpath)))
+                    if len(pending) > 2 * jobs:
+                        self.__write_file(*pending.popleft())
+
+            while pending:
+                self.__write_file(*pending.popleft())
+
+    def __write_file(self, arcname, future):
+        st, data = future.result()
+        zinfo = zipfile.ZipInfo(arcname, date_time=get_zipinfo_datetime(st.st_mtime))
+        zinfo.external_attr = (stat.S_IMODE(st.st_mode) | stat.S_IFMT(st.st_mode)) << 16
+        if os.path.splitext(arcname)[1].lower() in _COMPRESSED_SUFFIXES:
+            # Deflating them again would only burn CPU
+            zinfo.compress_type = zipfile.ZIP_STORED
+        else:
+            zinfo.compress_type = self.wheel_zip.compression
+        self.wheel_zip.writestr(zinfo, data)
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+
+# Files which are already compressed
+_COMPRESSED_SUFFIXES = frozenset((
+    '.gz', '.tgz', '.xz', '.bz2', '.zst', '.zip', '.whl', '.jar',
+    '.png', '.jpg', '.jpeg', '.gif', '.webp',
+))
+
+
+# Larger files are mapped instead of being copied into a bytes object
+_MMAP_THRESHOLD = 4 * 1024 * 1024
+
+
+def _read_file(path):
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        if st.st_size < _MMAP_THRESHOLD:
+            return st, f.read()
+
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(data, 'madvise'):
+            # Still start reading ahead of the compression
+            data.madvise(mmap.MADV_WILLNEED)
+        return st, data
 
 
 def build_wheel(wheel_directory,
@@ -855,48 +1087,109 @@ def build_wheel(wheel_directory,
         wheel_directory), metadata_directory)
 
 
+_TAR_BUFSIZE = 2 * 1024 * 1024
+
+
+def _iter_dist_archive(path: str, archive_format: str):
+    """Yields (TarInfo, fileobj) for each member of a meson dist archive"""
+    if archive_format in ('gztar', 'xztar'):
+        with tarfile.open(path, mode='r|*', bufsize=_TAR_BUFSIZE) as archive:
+            for member in archive:
+                yield member, archive.extractfile(member) if member.isreg() else None
+        return
+
+    with zipfile.ZipFile(path) as archive:
+        for zinfo in archive.infolist():
+            member = tarfile.TarInfo(zinfo.filename.rstrip('/'))
+            member.mtime = int(time.mktime(zinfo.date_time + (0, 0, -1)))
+            member.mode = (zinfo.external_attr >> 16) or (0o755 if zinfo.is_dir() else 0o644)
+            if zinfo.is_dir():
+                member.type = tarfile.DIRTYPE
+                yield member, None
+            else:
+                member.size = zinfo.file_size
+                with archive.open(zinfo) as f:
+                    yield member, f
+
+
+@contextlib.contextmanager
+def _gzip_writer(path: str, mtime: T.Optional[int]):
+    """Compresses with pigz or an external gzip, in this order of
+    preference, falling back to python's gzip module"""
+    # -n doesn't store the name and timestamp so the output is reproducible
+    pigz = shutil.which('pigz')
+    gzip = shutil.which('gzip')
+    if pigz:
+        args = [pigz, '-n', '-9', '-p', str(get_jobs())]
+    elif gzip:
+        args = [gzip, '-n', '-9']
+    else:
+        with GzipFile(path, mode='wb', mtime=mtime) as gz:
+            yield gz
+        return
+
+    with open(path, 'wb') as f:
+        proc = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=f)
+        try:
+            yield proc.stdin
+        finally:
+            proc.stdin.close()
+            returncode = proc.wait()
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, proc.args)
+
+
 def build_sdist(sdist_directory, config_settings: T.Dict[str, str]):
     """Builds an sdist, places it in sdist_directory"""
     setup_logging(config_settings)
 
-    distdir = Path(sdist_directory)
-    with tempfile.TemporaryDirectory() as builddir:
-        with tempfile.TemporaryDirectory() as installdir:
-            config = Config(config_settings)
+    with tempfile.TemporaryDirectory() as workdir:
+        builddir = os.path.join(workdir, 'build')
+        installdir = os.path.join(workdir, 'install')
+        config = Config(config_settings)
 
-            MesonSetupCommand(config, installdir, builddir,
-                config_settings=config_settings).execute()
+        MesonSetupCommand(config, installdir, builddir,
+            config_settings=config_settings).execute()
 
-            config.set_builddir(builddir)
-            mesondistcmd = MesonDistCommand('-C', builddir, config_settings=config_settings)
-            mesondistcmd.execute()
-
-            formats = mesondistcmd.formats()
-            # assert here, because this can't be None if the subprocess exited with a 0 return code
-            assert formats
-            tf_dir = '{}-{}'.format(config['module'], config['version'])
-            mesondistfilename = f'{tf_dir}{mesondistcmd.file_extenstion(formats[0])}'
-            if formats[0] == 'gztar' or formats[0] == 'xztar':
-                mesondistarch = tarfile.open(
-                    Path(builddir) / 'meson-dist' / mesondistfilename)
-            else:
-                mesondistarch = zipfile.ZipFile(Path(builddir) / 'meson-dist' / mesondistfilename)
-            mesondistarch.extractall(installdir)
-
-            pkg_info = config.get_metadata()
-            distfilename = '%s.tar.gz' % tf_dir
-            target = distdir / distfilename
-            source_date_epoch = os.environ.get('SOURCE_DATE_EPOCH', '')
-            mtime = int(source_date_epoch) if source_date_epoch else None
-            with GzipFile(str(target), mode='wb', mtime=mtime) as gz:
-                with cd(installdir):
-                    with tarfile.TarFile(str(target), mode='w',
-                                         fileobj=gz,
-                                         format=tarfile.PAX_FORMAT) as tf:
-                        tf.add(tf_dir, recursive=True)
-                        pkginfo_path = Path(installdir) / tf_dir / 'PKG-INFO'
-                        with open(pkginfo_path, mode='w') as fpkginfo:
-                            fpkginfo.write(pkg_info)
-                            fpkginfo.flush()
-                            tf.add(Path(tf_dir) / 'PKG-INFO')
-    return target.name
+        config.set_builddir(builddir)
+        pkg_info = config.get_metadata()
+        mesondistcmd = MesonDistCommand('-C', builddir, config_settings=config_settings)
+        mesondistcmd.execute()
+
+        formats = mesondistcmd.formats()
+        # assert here, because this can't be None if the subprocess exited with a 0 return code
+        assert formats
+        tf_dir = '{}-{}'.format(config['module'], config['version'])
+        mesondistfilename = f'{tf_dir}{mesondistcmd.file_extenstion(formats[0])}'
+        mesondistpath = os.path.join(builddir, 'meson-dist', mesondistfilename)
+        distfilename = '%s.tar.gz' % tf_dir
+        target = os.path.join(sdist_directory, distfilename)
+        source_date_epoch = os.environ.get('SOURCE_DATE_EPOCH', '')
+        mtime = int(source_date_epoch) if source_date_epoch else None
+        with _gzip_writer(target, mtime) as gz:
+            # Copy the files and write to the compressor in large chunks
+            # instead of the 16 KiB/10 KiB defaults.
+            with tarfile.open(fileobj=gz, mode='w|', format=tarfile.PAX_FORMAT,
+                              bufsize=_TAR_BUFSIZE, copybufsize=_TAR_BUFSIZE) as tf:
+                # Members are copied as is, without going through the disk
+                for member, fileobj in _iter_dist_archive(mesondistpath, formats[0]):
+                    if member.name != tf_dir and not member.name.startswith(f'{tf_dir}/'):
+                        continue
+                    # Same permissions as extracting with a 022 umask used to give
+                    member.mode &= 0o755
+                    # Do not leak the ownership and times of the machine
+                    # which built the archive, path and link name headers
+                    # are regenerated when needed.
+                    member.uid = member.gid = 0
+                    member.uname = member.gname = ''
+                    member.pax_headers = {}
+                    if mtime is not None:
+                        member.mtime = mtime
+                    tf.addfile(member, fileobj)
+                pkginfo = pkg_info.encode('utf-8')
+                tarinfo = tarfile.TarInfo(f'{tf_dir}/PKG-INFO')
+                tarinfo.size = len(pkginfo)
+                tarinfo.mtime = mtime if mtime is not None else int(time.time())
+                tarinfo.mode = 0o644
+                tf.addfile(tarinfo, io.BytesIO(pkginfo))
+    return distfilename
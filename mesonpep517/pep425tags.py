@@ -30,13 +30,21 @@
 #
 """Generate PEP 425 compatibility tags."""
 
-import distutils.util
 import platform
 import sys
 import sysconfig
 import warnings
 
+# This module is also run by the interpreter a wheel is built for (see
+# buildapi.GET_CHECK), which can be older than the one running the build.
+try:
+    from functools import lru_cache
+except ImportError:
+    def lru_cache(maxsize=None):
+        return lambda func: func
 
+
+@lru_cache(maxsize=None)
 def get_abbr_impl():
     """Return abbreviated implementation name."""
     impl = platform.python_implementation()
@@ -52,6 +60,7 @@ def get_abbr_impl():
     raise LookupError("Unknown Python implementation: " + impl)
 
 
+@lru_cache(maxsize=None)
 def get_abi_tag():
     """Return the ABI tag based on SOABI (if available) or emulate SOABI
     (CPython 2, PyPy)."""
@@ -117,6 +126,7 @@ def get_flag(var, fallback, expected=True, warn=True):
     return val == expected
 
 
+@lru_cache(maxsize=None)
 def get_impl_ver():
     """Return implementation version."""
     impl_ver = get_config_var("py_version_nodot")
@@ -125,6 +135,14 @@ def get_impl_ver():
     return impl_ver
 
 
+@lru_cache(maxsize=None)
 def get_platform_tag():
     """Return the PEP-425 compatible platform tag."""
-    return distutils.util.get_platform().replace("-", "_").replace(".", "_")
+    result = sysconfig.get_platform()
+    # 32-bit interpreter on a 64-bit kernel, as done by wheel's bdist_wheel
+    if sys.maxsize == 2147483647:
+        if result == "linux-x86_64":
+            result = "linux-i686"
+        elif result == "linux-aarch64":
+            result = "linux-armv7l"
+    return result.replace("-", "_").replace(".", "_")
@@ -1,4 +1,7 @@
-VALID_OPTIONS = {
+from types import MappingProxyType
+
+# Read-only, shared by every Config instance
+VALID_OPTIONS = MappingProxyType({
     # In [project]
     "name": {
         "description":
@@ -56,6 +59,24 @@ after a semicolon. For example:
         'See: https://www.python.org/dev/peps/pep-0621/#urls'
     },
 
+    "scripts": {
+        'description': 'A table of console scripts where the key is the name of the '
+        'script and the value is the object reference.\n'
+        'See: https://www.python.org/dev/peps/pep-0621/#entry-points'
+    },
+
+    "gui-scripts": {
+        'description': 'A table of GUI scripts where the key is the name of the '
+        'script and the value is the object reference.\n'
+        'See: https://www.python.org/dev/peps/pep-0621/#entry-points'
+    },
+
+    "entry-points": {
+        'description': 'A table of entry point groups, each one being a table '
+        'where the key is the name of the entry point and the value is the object reference.\n'
+        'See: https://www.python.org/dev/peps/pep-0621/#entry-points'
+    },
+
     "dynamic": {
         "description":
         'An array of strings, Specifies which fields listed by this PEP were '
@@ -223,4 +244,7 @@ after a semicolon. For example:
         "description": "A one sentence summary about the package"
     },
 
-}
+})
+
+REQUIRED_OPTIONS = frozenset(
+    field for field, desc in VALID_OPTIONS.items() if desc.get('required'))